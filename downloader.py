@@ -1,9 +1,12 @@
 # downloader.py
 import re
-import subprocess
+import atexit
 import tempfile
 from pathlib import Path
 
+from yt_dlp import YoutubeDL
+from yt_dlp.utils import DownloadError as YtDlpDownloadError
+
 
 class DownloadError(Exception):
     """下载失败时抛出的异常"""
@@ -11,13 +14,32 @@ class DownloadError(Exception):
 
 
 # yt-dlp 基础参数：启用 EJS 解题器以通过 YouTube 反爬验证
-_YT_DLP_BASE = ["yt-dlp", "--remote-components", "ejs:github"]
+_YDL_BASE_OPTS = {
+    "remote_components": ["ejs:github"],
+}
+
+# 可能的音频扩展名：原生容器（webm/m4a）优先，兼容旧缓存（opus/mp3）
+_AUDIO_EXTS = (".webm", ".m4a", ".opus", ".ogg", ".mp3")
+
+
+def _find_audio_file(output_dir: str, safe_title: str) -> Path | None:
+    """按已知音频扩展名查找已下载的文件"""
+    for ext in _AUDIO_EXTS:
+        candidate = Path(output_dir) / f"{safe_title}{ext}"
+        if candidate.exists() and candidate.stat().st_size > 0:
+            return candidate
+    return None
+
+
+# 文件名非法字符删除表（str.translate 走 C 实现）与空白折叠正则，模块加载时编译一次
+_FORBIDDEN_CHARS = str.maketrans("", "", '\\/*?:"<>|')
+_WHITESPACE = re.compile(r'\s+')
 
 
 def _sanitize_filename(name: str) -> str:
     """将视频标题转为安全的文件名"""
-    name = re.sub(r'[\\/*?:"<>|]', '', name)
-    name = re.sub(r'\s+', '_', name.strip())
+    name = name.translate(_FORBIDDEN_CHARS)
+    name = _WHITESPACE.sub('_', name.strip())
     return name[:200] if name else "untitled"
 
 
@@ -41,34 +63,56 @@ def _write_cookies_file(cookies: list[dict]) -> Path:
     return Path(tmp.name)
 
 
-def _get_cookie_args(cookies: list[dict] | None, browser: str | None) -> tuple[list[str], Path | None]:
-    """返回 (yt-dlp cookie 参数列表, 临时文件路径 or None)
-    优先使用 Extension 传来的 cookies，其次 --cookies-from-browser"""
+# 按浏览器缓存的 cookie 文件：{browser: Path}
+# 读取浏览器 cookie 库（macOS 上涉及 Keychain 解密）只做一次，之后直接读文件
+_browser_cookie_cache: dict[str, Path] = {}
+
+
+def _browser_cookie_file(browser: str) -> Path:
+    """首次调用时把浏览器 cookies 导出成 Netscape 格式文件并缓存
+
+    cookiesfrombrowser 每次都要重新读取并解密整个浏览器 cookie 库，
+    批量处理时每个视频都要付一次这个开销；导出一次后复用文件即可。
+    """
+    cached = _browser_cookie_cache.get(browser)
+    if cached and cached.exists():
+        return cached
+
+    tmp = tempfile.NamedTemporaryFile(
+        suffix=".txt", prefix=f"yt2text_browser_cookies_{browser}_", delete=False
+    )
+    tmp.close()
+    path = Path(tmp.name)
+    with YoutubeDL({"quiet": True, "cookiesfrombrowser": (browser,)}) as ydl:
+        ydl.cookiejar.save(str(path), ignore_discard=True, ignore_expires=True)
+
+    _browser_cookie_cache[browser] = path
+    atexit.register(path.unlink, missing_ok=True)
+    return path
+
+
+def _get_cookie_opts(cookies: list[dict] | None, browser: str | None,
+                     cookie_file: str | Path | None = None) -> tuple[dict, Path | None]:
+    """返回 (yt-dlp cookie 相关参数, 临时文件路径 or None)
+    优先级：现成的 Netscape cookie 文件 > Extension 传来的 cookies 列表
+    > 浏览器 cookies（导出一次后复用）"""
+    if cookie_file:
+        # 调用方已经写好的 cookie 文件，直接透传，生命周期由调用方管理
+        print(f"🍪 使用调用方提供的 cookie 文件: {cookie_file}")
+        return {"cookiefile": str(cookie_file)}, None
     if cookies:
         cookie_file = _write_cookies_file(cookies)
         print(f"🍪 使用 Chrome Extension cookies ({len(cookies)} 条)")
-        return ["--cookies", str(cookie_file)], cookie_file
+        return {"cookiefile": str(cookie_file)}, cookie_file
     if browser:
-        print(f"🍪 使用浏览器 cookies: {browser}")
-        return ["--cookies-from-browser", browser], None
-    return [], None
-
-
-def _get_video_title(url: str, cookies: list[dict] | None = None, browser: str | None = None) -> str:
-    """获取视频标题"""
-    cookie_args, cookie_file = _get_cookie_args(cookies, browser)
-    command = _YT_DLP_BASE + ["--print", "title", url] + cookie_args
-
-    try:
-        result = subprocess.run(command, capture_output=True, text=True)
-        if result.returncode == 0 and result.stdout.strip():
-            return result.stdout.strip()
-        if result.stderr.strip():
-            print(f"   ⚠️  yt-dlp stderr: {result.stderr.strip()}")
-    finally:
-        if cookie_file:
-            cookie_file.unlink(missing_ok=True)
-    return ""
+        try:
+            cookie_path = _browser_cookie_file(browser)
+            print(f"🍪 使用浏览器 cookies: {browser}（已缓存为文件）")
+            return {"cookiefile": str(cookie_path)}, None
+        except Exception as e:
+            print(f"⚠️  导出浏览器 cookies 失败，回退为每次读取: {e}")
+            return {"cookiesfrombrowser": (browser,)}, None
+    return {}, None
 
 
 def _parse_download_error(stderr: str) -> str:
@@ -83,62 +127,60 @@ def _parse_download_error(stderr: str) -> str:
         return f"下载失败：{stderr.strip()}"
 
 
-def download_audio(url: str, output_dir: str = "output", browser: str = None, cookies: list[dict] | None = None, title: str | None = None) -> Path:
+def download_audio(url: str, output_dir: str = "output", browser: str = None, cookies: list[dict] | None = None, title: str | None = None, cookie_file: str | Path | None = None) -> Path:
     Path(output_dir).mkdir(exist_ok=True)
 
-    # 优先使用 Extension 传来的标题，省去 yt-dlp 取标题的耗时
-    if not title:
-        print("📋 获取视频标题...")
-        title = _get_video_title(url, cookies=cookies, browser=browser)
-    if not title:
-        print("⚠️  无法获取视频标题，使用默认文件名")
-        safe_title = "audio"
-    else:
-        safe_title = _sanitize_filename(title)
-        print(f"   标题: {title}")
-
-    audio_path = Path(output_dir) / f"{safe_title}.opus"
+    cookie_opts, tmp_cookie_file = _get_cookie_opts(cookies, browser, cookie_file)
 
-    # 兼容旧缓存：检查 .opus 和 .mp3
-    for ext in (".opus", ".mp3"):
-        candidate = Path(output_dir) / f"{safe_title}{ext}"
-        if candidate.exists() and candidate.stat().st_size > 0:
-            print(f"⏩ 音频文件已存在，跳过下载: {candidate}")
-            return candidate
-
-    output_template = f"{output_dir}/{safe_title}.%(ext)s"
-    cookie_args, cookie_file = _get_cookie_args(cookies, browser)
-
-    command = _YT_DLP_BASE + [
-        "-f", "ba[abr<=64]/wa/ba",   # 选最小音频流，语音识别无需高音质
-        "-x",
-        "--audio-format", "opus",     # 保持 opus 原生格式，跳过 mp3 转码
-        "--no-playlist",
-        url,
-        "-o", output_template,
-    ] + cookie_args
+    ydl_opts = _YDL_BASE_OPTS | cookie_opts | {
+        "format": "ba[abr<=64]/wa/ba",   # 选最小音频流，语音识别无需高音质
+        # 不做任何转码/提取：保留原生容器（webm/m4a），Whisper 解码时反正要过 ffmpeg，
+        # 省掉下载后的一整遍 ffmpeg 处理
+        "noplaylist": True,
+        "outtmpl": {"default": f"{output_dir}/%(id)s.%(ext)s"},
+    }
 
     try:
-        print(f"   ▶ yt-dlp 开始下载...")
-        result = subprocess.run(command, capture_output=True, text=True)
-        # 打印 yt-dlp 输出以便诊断耗时
-        if result.stdout.strip():
-            for line in result.stdout.strip().split("\n"):
-                print(f"   [yt-dlp] {line}")
-        if result.returncode != 0:
-            print(f"   ❌ yt-dlp stderr:\n{result.stderr.strip()}")
-            msg = _parse_download_error(result.stderr)
-            raise DownloadError(msg)
+        with YoutubeDL(ydl_opts) as ydl:
+            info = None
+            # 优先使用 Extension 传来的标题，省去取元数据的耗时；
+            # 否则复用同一个 YoutubeDL 实例取一次元数据，标题和下载共用，
+            # 不再为取标题单独启动一次 yt-dlp
+            if not title:
+                print("📋 获取视频元数据...")
+                info = ydl.extract_info(url, download=False)
+                title = info.get("title", "")
+            if not title:
+                print("⚠️  无法获取视频标题，使用默认文件名")
+                safe_title = "audio"
+            else:
+                safe_title = _sanitize_filename(title)
+                print(f"   标题: {title}")
+
+            # 缓存命中：任何已知扩展名的同名音频文件都算
+            cached = _find_audio_file(output_dir, safe_title)
+            if cached:
+                print(f"⏩ 音频文件已存在，跳过下载: {cached}")
+                return cached
+
+            ydl.params["outtmpl"]["default"] = f"{output_dir}/{safe_title}.%(ext)s"
+
+            print(f"   ▶ yt-dlp 开始下载...")
+            if info is not None:
+                # 元数据已取到，直接复用，避免重复请求
+                ydl.process_ie_result(info, download=True)
+            else:
+                ydl.download([url])
+    except YtDlpDownloadError as e:
+        msg = _parse_download_error(str(e))
+        raise DownloadError(msg) from e
     finally:
-        if cookie_file:
-            cookie_file.unlink(missing_ok=True)
-
-    # yt-dlp 实际输出的文件名可能与预期不同，做一次确认
-    if not audio_path.exists():
-        for ext in (".opus", ".webm", ".m4a", ".ogg", ".mp3"):
-            candidate = Path(output_dir) / f"{safe_title}{ext}"
-            if candidate.exists() and candidate.stat().st_size > 0:
-                audio_path = candidate
-                break
+        if tmp_cookie_file:
+            tmp_cookie_file.unlink(missing_ok=True)
+
+    # 下载后的扩展名由源格式决定，按已知扩展名确认实际产出的文件
+    audio_path = _find_audio_file(output_dir, safe_title)
+    if audio_path is None:
+        raise DownloadError(f"下载完成但未找到音频文件: {output_dir}/{safe_title}.*")
 
     return audio_path
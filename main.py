@@ -20,9 +20,13 @@
 
 
 import argparse
+import asyncio
 from downloader import download_audio, DownloadError
 from transcriber import transcribe
-from scraper import extract_video_urls
+from scraper import iter_video_urls
+
+# 同时进行的下载数量（下载吃网络带宽，转录吃 CPU，两者互不干扰）
+DOWNLOAD_CONCURRENCY = 4
 
 
 def is_single_video(url: str) -> bool:
@@ -44,45 +48,83 @@ def process_single(url: str, browser: str = None):
     print(f"✅ 完成: {transcript_path}")
 
 
-def process_batch(page_url: str, browser: str = None, limit: int = None):
-    """批量处理：提取页面所有视频链接，逐一下载并转录"""
-    urls = extract_video_urls(page_url, browser=browser, limit=limit)
-
-    if not urls:
-        print("❌ 未找到任何视频链接")
-        return
+async def process_batch(page_url: str, browser: str = None, limit: int = None):
+    """批量处理：提取页面所有视频链接，并发下载、串行转录
 
-    total = len(urls)
+    链接枚举是流式的：yt-dlp 每翻出一页链接就立刻开始下载，不等整个频道枚举完。
+    下载是网络密集型，用 asyncio + 信号量并发跑 DOWNLOAD_CONCURRENCY 路；
+    转录是 CPU/内存密集型（Whisper），保持单路消费队列，避免同时跑多个模型吃光内存。
+    下载耗时基本被转录耗时掩盖，批量总时长约等于纯转录时长。
+    """
     success_count = 0
     fail_count = 0
     skipped = []
     completed = []
 
-    for i, url in enumerate(urls, 1):
-        print(f"\n{'='*60}")
-        print(f"📌 [{i}/{total}] {url}")
-        print(f"{'='*60}")
-
-        try:
-            print("⬇️  下载音频...")
-            audio_path = download_audio(url, browser=browser)
-
-            print("🧠 转录中...")
-            transcript_path = transcribe(audio_path)
-
-            print(f"✅ 完成: {transcript_path}")
-            completed.append(str(transcript_path))
-            success_count += 1
-
-        except DownloadError as e:
-            print(f"⚠️  下载失败，跳过: {e}")
-            skipped.append((url, str(e)))
-            fail_count += 1
+    semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def download_one(i: int, url: str):
+        """生产者：下载音频，完成后放入转录队列"""
+        nonlocal fail_count
+        async with semaphore:
+            try:
+                print(f"⬇️  [{i}] 下载音频: {url}")
+                audio_path = await asyncio.to_thread(download_audio, url, browser=browser)
+                await queue.put((i, url, audio_path))
+            except DownloadError as e:
+                print(f"⚠️  [{i}] 下载失败，跳过: {e}")
+                skipped.append((url, str(e)))
+                fail_count += 1
+            except Exception as e:
+                print(f"⚠️  [{i}] 下载出错，跳过: {e}")
+                skipped.append((url, str(e)))
+                fail_count += 1
+
+    async def transcribe_worker():
+        """消费者：逐个转录已下载的音频（Whisper 内存大，保持串行）"""
+        nonlocal success_count, fail_count
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            i, url, audio_path = item
+            print(f"\n{'='*60}")
+            print(f"🧠 [{i}] 转录中: {audio_path}")
+            print(f"{'='*60}")
+            try:
+                transcript_path = await asyncio.to_thread(transcribe, audio_path)
+                print(f"✅ [{i}] 完成: {transcript_path}")
+                completed.append(str(transcript_path))
+                success_count += 1
+            except Exception as e:
+                print(f"⚠️  [{i}] 转录出错，跳过: {e}")
+                skipped.append((url, str(e)))
+                fail_count += 1
+
+    consumer = asyncio.create_task(transcribe_worker())
+
+    # 流式消费链接：每拿到一个链接立刻调度下载，不等枚举结束
+    url_iter = iter_video_urls(page_url, browser=browser, limit=limit)
+    download_tasks = []
+    total = 0
+    while True:
+        url = await asyncio.to_thread(next, url_iter, None)
+        if url is None:
+            break
+        total += 1
+        download_tasks.append(asyncio.create_task(download_one(total, url)))
+
+    if total == 0:
+        print("❌ 未找到任何视频链接")
+        await queue.put(None)
+        await consumer
+        return
 
-        except Exception as e:
-            print(f"⚠️  处理出错，跳过: {e}")
-            skipped.append((url, str(e)))
-            fail_count += 1
+    print(f"📋 共发现 {total} 个视频")
+    await asyncio.gather(*download_tasks)
+    await queue.put(None)
+    await consumer
 
     # 打印汇总报告
     print(f"\n{'='*60}")
@@ -130,7 +172,7 @@ def main():
         print("📂 批量模式 - 将提取页面上所有视频并逐一处理")
         if args.limit:
             print(f"   限制处理数量: {args.limit}")
-        process_batch(args.url, browser=args.browser, limit=args.limit)
+        asyncio.run(process_batch(args.url, browser=args.browser, limit=args.limit))
 
 
 if __name__ == "__main__":
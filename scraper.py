@@ -1,12 +1,81 @@
 # scraper.py
+import threading
 import subprocess
+from typing import Iterator
+from urllib.parse import urlparse, parse_qs
 
+import httpx
+
+from downloader import _browser_cookie_file
+
+# InnerTube：YouTube 网页端自己用的内部 API，枚举频道/播放列表只是几个 browse POST，
+# 不需要 yt-dlp 整个提取器框架的启动开销
+_INNERTUBE_BASE = "https://www.youtube.com/youtubei/v1"
+_INNERTUBE_CONTEXT = {"client": {"clientName": "WEB", "clientVersion": "2.20240101.00.00"}}
+
+# 收集视频 ID 的 renderer 类型（不同页面布局用不同的 renderer）
+_VIDEO_RENDERERS = ("videoRenderer", "gridVideoRenderer", "playlistVideoRenderer", "reelItemRenderer")
+
+
+def _collect_videos(node, video_ids: list[str], tokens: list[str]):
+    """递归遍历 InnerTube 响应，收集视频 ID 和翻页 token"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in _VIDEO_RENDERERS and isinstance(value, dict) and "videoId" in value:
+                video_ids.append(value["videoId"])
+            elif key == "continuationCommand" and isinstance(value, dict) and "token" in value:
+                tokens.append(value["token"])
+            else:
+                _collect_videos(value, video_ids, tokens)
+    elif isinstance(node, list):
+        for item in node:
+            _collect_videos(item, video_ids, tokens)
 
-def extract_video_urls(page_url: str, browser: str = None, limit: int = None) -> list[str]:
-    """从 YouTube 频道/播放列表页面提取所有视频链接
 
-    使用 yt-dlp 的 --flat-playlist 模式快速提取，不下载视频本身。
+def _innertube_video_urls(page_url: str, limit: int = None) -> list[str]:
+    """快速路径：直接调 InnerTube browse 接口枚举视频链接
+
+    播放列表直接用 "VL"+列表 ID 作为 browseId；频道页面（@handle 等）先走
+    resolve_url 解析。任何解析不了的情况抛异常，由调用方回退到 yt-dlp。
     """
+    with httpx.Client(headers={"Content-Type": "application/json"}, timeout=15) as client:
+        query = parse_qs(urlparse(page_url).query)
+        if "list" in query:
+            payload = {"context": _INNERTUBE_CONTEXT, "browseId": "VL" + query["list"][0]}
+        else:
+            resp = client.post(
+                f"{_INNERTUBE_BASE}/navigation/resolve_url",
+                json={"context": _INNERTUBE_CONTEXT, "url": page_url},
+            )
+            resp.raise_for_status()
+            endpoint = resp.json()["endpoint"]["browseEndpoint"]
+            payload = {"context": _INNERTUBE_CONTEXT, "browseId": endpoint["browseId"]}
+            if endpoint.get("params"):
+                payload["params"] = endpoint["params"]
+
+        urls = []
+        seen = set()
+        for _page in range(100):     # 翻页上限，防御畸形响应导致的死循环
+            resp = client.post(f"{_INNERTUBE_BASE}/browse", json=payload)
+            resp.raise_for_status()
+            video_ids, tokens = [], []
+            _collect_videos(resp.json(), video_ids, tokens)
+            for vid in video_ids:
+                if vid not in seen:
+                    seen.add(vid)
+                    urls.append(f"https://www.youtube.com/watch?v={vid}")
+                    if limit and len(urls) >= limit:
+                        return urls
+            if not tokens:
+                break
+            payload = {"context": _INNERTUBE_CONTEXT, "continuation": tokens[0]}
+
+    if not urls:
+        raise ValueError("InnerTube 响应中未解析到任何视频")
+    return urls
+
+
+def _build_command(page_url: str, browser: str = None, limit: int = None) -> list[str]:
     command = [
         "yt-dlp",
         "--remote-components", "ejs:github",
@@ -16,18 +85,79 @@ def extract_video_urls(page_url: str, browser: str = None, limit: int = None) ->
     ]
 
     if browser:
-        command += ["--cookies-from-browser", browser]
+        try:
+            command += ["--cookies", str(_browser_cookie_file(browser))]
+        except Exception:
+            command += ["--cookies-from-browser", browser]
 
     if limit:
         command += ["--playlist-end", str(limit)]
 
-    print("🔍 正在从页面提取视频链接（可能需要一些时间）...")
-    result = subprocess.run(command, capture_output=True, text=True)
+    return command
 
-    if result.returncode != 0:
-        print(f"❌ 提取视频链接失败：\n{result.stderr}")
-        return []
 
-    urls = [line.strip() for line in result.stdout.strip().split("\n") if line.strip()]
+def iter_video_urls(page_url: str, browser: str = None, limit: int = None) -> Iterator[str]:
+    """流式提取 YouTube 频道/播放列表页面的视频链接
+
+    yt-dlp 子进程边翻页边往 stdout 打印链接，这里按行读取并立刻 yield，
+    让下载可以在枚举还没结束时就开始。Python API 的 extract_info 会把整个
+    播放列表翻完才返回，大频道（500+ 视频）要白等全部分页抓完。
+
+    公开内容优先走 InnerTube 快速路径（几个 HTTP POST，无 yt-dlp 启动开销）；
+    需要浏览器 cookies（会员内容）或快速路径解析失败时回退 yt-dlp。
+    """
+    if not browser:
+        try:
+            urls = _innertube_video_urls(page_url, limit=limit)
+            print(f"🔍 InnerTube 快速提取到 {len(urls)} 个视频链接")
+            yield from urls
+            return
+        except Exception as e:
+            print(f"   ⚠️ InnerTube 快速提取失败，回退 yt-dlp: {e}")
+
+    command = _build_command(page_url, browser=browser, limit=limit)
+
+    print("🔍 正在从页面提取视频链接（边提取边处理）...")
+    proc = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+    )
+
+    # stderr 必须与 stdout 同时排空：yt-dlp 在大频道上的警告动辄超过
+    # 管道缓冲（约 64KB），这边只读 stdout 的话子进程会卡在写 stderr 上，
+    # stdout 随之断流，整条流水线死锁
+    stderr_lines: list[str] = []
+    stderr_thread = threading.Thread(
+        target=lambda: stderr_lines.extend(proc.stderr), daemon=True
+    )
+    stderr_thread.start()
+
+    count = 0
+    try:
+        for line in proc.stdout:
+            url = line.strip()
+            if not url:
+                continue
+            yield url
+            count += 1
+            if limit and count >= limit:
+                proc.terminate()
+                break
+    finally:
+        if proc.poll() is None:
+            proc.terminate()
+        proc.wait()
+        stderr_thread.join()
+
+    if count == 0 and proc.returncode != 0:
+        print(f"❌ 提取视频链接失败：\n{''.join(stderr_lines)}")
+
+
+def extract_video_urls(page_url: str, browser: str = None, limit: int = None) -> list[str]:
+    """一次性提取页面所有视频链接（iter_video_urls 的物化版本）"""
+    urls = list(iter_video_urls(page_url, browser=browser, limit=limit))
     print(f"📋 共发现 {len(urls)} 个视频")
     return urls
@@ -5,23 +5,34 @@
 #   uvicorn server:app --reload --port 8765
 #
 # API:
-#   POST /api/process         处理单个视频（下载 + 转录）
-#   POST /api/batch           批量处理多个视频
-#   GET  /api/tasks           查询所有任务状态
-#   GET  /api/tasks/{task_id} 查询单个任务状态
+#   POST /api/process                处理单个视频（下载 + 转录）
+#   POST /api/batch                  批量处理多个视频
+#   GET  /api/tasks                  查询所有任务状态（支持 ETag 304）
+#   GET  /api/tasks/{task_id}        查询单个任务状态（支持 ETag 304）
+#   GET  /api/tasks/{task_id}/stream SSE 推送任务状态变化（替代轮询）
 
+import json
 import time
 import uuid
+import asyncio
+import tempfile
 import threading
+import concurrent.futures
 from pathlib import Path
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
 from downloader import download_audio, DownloadError
-from transcriber import transcribe_and_format
+from transcriber import transcribe_and_format, _get_whisper_model
 
-app = FastAPI(title="yt2text API")
+# orjson 序列化比标准库 json 快数倍，转录内容动辄几百 KB，轮询时差距明显
+app = FastAPI(title="yt2text API", default_response_class=ORJSONResponse)
+
+# 大响应（转录内容）走 gzip 压缩
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # 允许 Chrome Extension 跨域访问
 app.add_middleware(
@@ -34,10 +45,70 @@ app.add_middleware(
 # ── 任务存储 ──────────────────────────────────────────────
 # 主状态流转: queued → downloading → transcribing → done / failed
 # 格式化状态: None → in_progress → done / failed （后台异步，不阻塞主流程）
+# 每个任务自带 "_lock"（保护字段更新）和 "version"（每次变更 +1，用于 ETag）
 tasks: dict[str, dict] = {}
-# 串行处理队列（避免同时跑多个 Whisper 吃光内存）
-_queue_lock = threading.Lock()
-_processing = False
+# 常驻工作线程池：max_workers=1 保证任务串行执行（避免同时跑多个 Whisper 吃光内存），
+# 提交顺序即执行顺序，省去每个任务新建线程和手写队列调度
+_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="yt2text")
+
+# 全局版本号：任何任务发生变更都 +1，用于任务列表的 ETag。
+# 工作线程和请求线程都会递增，+= 不是原子操作，统一经 _bump_global_version 加锁
+_global_version = 0
+_global_version_lock = threading.Lock()
+
+
+def _bump_global_version():
+    global _global_version
+    with _global_version_lock:
+        _global_version += 1
+
+# 已完成任务保留上限：任务携带完整转录内容（可达数百 KB），
+# 服务器长期运行时无限保留会越积越大
+_MAX_FINISHED_TASKS = 1000
+# 保护 tasks 容器本身的增删（字段更新由每个任务自己的 _lock 保护）
+_tasks_lock = threading.Lock()
+
+
+def _evict_finished_tasks():
+    """超过上限时按插入顺序淘汰最旧的已完成任务（dict 本身保序）
+
+    调用方必须持有 _tasks_lock：扫描先物化成列表、删除另起一轮，
+    锁保证期间没有别的线程增删 tasks
+    """
+    finished = [tid for tid, t in tasks.items() if t["status"] in ("done", "failed")]
+    excess = len(finished) - _MAX_FINISHED_TASKS
+    for tid in finished[:excess] if excess > 0 else []:
+        task = tasks[tid]
+        with task["_lock"]:
+            if task["_subscribers"]:
+                continue    # 还有 SSE 订阅者在看，先留着
+            del tasks[tid]
+
+# 服务器事件循环（startup 时捕获，工作线程借此向 SSE 订阅者推送）
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+@app.on_event("startup")
+async def _capture_event_loop():
+    global _loop
+    _loop = asyncio.get_running_loop()
+    # 预热 Whisper 模型：服务一启动就在工作线程里加载，
+    # 第一个任务不用再等模型冷加载（模型本身是进程级单例，之后所有任务复用）
+    _EXECUTOR.submit(_get_whisper_model)
+
+
+def _update_task(task_id: str, **fields):
+    """在锁保护下更新任务字段，递增版本号，并向 SSE 订阅者推送快照"""
+    task = tasks[task_id]
+    with task["_lock"]:
+        task.update(fields)
+        task["version"] += 1
+        snapshot = _safe_task(task)
+        subscribers = list(task["_subscribers"])
+    _bump_global_version()
+    if _loop is not None:
+        for queue in subscribers:
+            _loop.call_soon_threadsafe(queue.put_nowait, snapshot)
 
 
 class CookieItem(BaseModel):
@@ -65,29 +136,32 @@ class BatchRequest(BaseModel):
 
 # ── 任务执行 ──────────────────────────────────────────────
 
-def _run_task(task_id: str, url: str, browser: str | None, cookies: list | None):
+def _run_task(task_id: str, url: str, browser: str | None, cookies: list | None,
+              cookie_file: str | None = None):
     """下载 + 转录 + 格式化融合流水线"""
-    global _processing
     try:
         t_start = time.time()
         timing = {}
 
         # ── 下载 ──
-        tasks[task_id]["status"] = "downloading"
+        _update_task(task_id, status="downloading")
         t0 = time.time()
-        audio_path = download_audio(url, browser=browser, cookies=cookies, title=tasks[task_id].get("title"))
+        audio_path = download_audio(url, browser=browser, cookies=cookies,
+                                    title=tasks[task_id].get("title"), cookie_file=cookie_file)
         timing["download"] = round(time.time() - t0, 1)
         print(f"⏱️ 下载耗时: {timing['download']}s")
 
         # ── 转录 + 格式化 ──
-        tasks[task_id]["status"] = "transcribing"
-        tasks[task_id]["formatting"] = "in_progress"
+        _update_task(task_id, status="transcribing", formatting="in_progress")
 
         def on_update(content: str, formatted_count: int, total_paragraphs: int):
-            tasks[task_id]["content"] = content
+            fields = {
+                "content": content,
+                "elapsed": round(time.time() - t_start, 1),
+            }
             if total_paragraphs > 0:
-                tasks[task_id]["formatting_progress"] = f"{formatted_count}/{total_paragraphs}"
-            tasks[task_id]["elapsed"] = round(time.time() - t_start, 1)
+                fields["formatting_progress"] = f"{formatted_count}/{total_paragraphs}"
+            _update_task(task_id, **fields)
 
         tf_timing = {}
         transcript_path, final_content = transcribe_and_format(
@@ -96,13 +170,16 @@ def _run_task(task_id: str, url: str, browser: str | None, cookies: list | None)
         timing.update(tf_timing)
 
         timing["total"] = round(time.time() - t_start, 1)
-        tasks[task_id]["status"] = "done"
-        tasks[task_id]["content"] = final_content
-        tasks[task_id]["result"] = str(transcript_path)
-        tasks[task_id]["formatting"] = "done"
-        tasks[task_id]["formatting_progress"] = None
-        tasks[task_id]["elapsed"] = timing["total"]
-        tasks[task_id]["timing"] = timing
+        _update_task(
+            task_id,
+            status="done",
+            content=final_content,
+            result=str(transcript_path),
+            formatting="done",
+            formatting_progress=None,
+            elapsed=timing["total"],
+            timing=timing,
+        )
 
         print(f"\n⏱️ ══ 耗时明细 ══")
         print(f"   下载:        {timing.get('download', '-')}s")
@@ -117,55 +194,40 @@ def _run_task(task_id: str, url: str, browser: str | None, cookies: list | None)
         print(f"   总计:        {timing['total']}s")
 
     except DownloadError as e:
-        tasks[task_id]["status"] = "failed"
-        tasks[task_id]["error"] = str(e)
+        _update_task(task_id, status="failed", error=str(e))
     except Exception as e:
-        tasks[task_id]["status"] = "failed"
-        tasks[task_id]["error"] = str(e)
+        _update_task(task_id, status="failed", error=str(e))
     finally:
-        _processing = False
-        _process_next()
-
-
-def _process_next():
-    """从队列中取出下一个 queued 任务执行"""
-    global _processing
-    with _queue_lock:
-        if _processing:
-            return
-        # 找第一个 queued 的任务
-        for task_id, task in tasks.items():
-            if task["status"] == "queued":
-                _processing = True
-                thread = threading.Thread(
-                    target=_run_task,
-                    args=(task_id, task["url"], task["browser"], task.get("cookies")),
-                    daemon=True,
-                )
-                thread.start()
-                return
+        if cookie_file:
+            Path(cookie_file).unlink(missing_ok=True)
 
 
 def _create_task(url: str, title: str | None, browser: str | None,
-                  cookies: list | None = None) -> str:
+                  cookies: list | None = None, cookie_file: str | None = None) -> str:
     """创建一个新任务并加入队列"""
     task_id = uuid.uuid4().hex[:8]
-    tasks[task_id] = {
-        "id": task_id,
-        "url": url,
-        "title": title or url,
-        "browser": browser,
-        "cookies": cookies,
-        "status": "queued",
-        "result": None,
-        "content": None,
-        "formatting": None,
-        "formatting_progress": None,
-        "elapsed": None,
-        "timing": None,
-        "error": None,
-    }
-    _process_next()
+    with _tasks_lock:
+        _evict_finished_tasks()
+        tasks[task_id] = {
+            "id": task_id,
+            "url": url,
+            "title": title or url,
+            "browser": browser,
+            "cookies": cookies,
+            "status": "queued",
+            "result": None,
+            "content": None,
+            "formatting": None,
+            "formatting_progress": None,
+            "elapsed": None,
+            "timing": None,
+            "error": None,
+            "version": 0,
+            "_lock": threading.Lock(),
+            "_subscribers": set(),
+        }
+    _bump_global_version()
+    _EXECUTOR.submit(_run_task, task_id, url, browser, cookies, cookie_file)
     return task_id
 
 
@@ -179,6 +241,28 @@ def process_video(req: ProcessRequest):
     return {"task_id": task_id}
 
 
+@app.post("/api/process/raw")
+async def process_video_raw(request: Request, url: str, title: str | None = None,
+                            browser: str | None = None):
+    """提交单个视频处理任务，cookies 以 Netscape 原文作为请求体传输
+
+    跳过 list[CookieItem] 的逐条 Pydantic 校验和 JSON 往返：请求体原样落盘，
+    yt-dlp 直接读文件。cookies 很多时（登录态动辄上百条）比 JSON 路径省一轮
+    校验和序列化。
+    """
+    body = await request.body()
+    cookie_file = None
+    if body.strip():
+        tmp = tempfile.NamedTemporaryFile(
+            mode="wb", suffix=".txt", prefix="yt2text_raw_cookies_", delete=False
+        )
+        tmp.write(body)
+        tmp.close()
+        cookie_file = tmp.name
+    task_id = _create_task(url, title, browser, cookie_file=cookie_file)
+    return {"task_id": task_id}
+
+
 @app.post("/api/batch")
 def batch_process(req: BatchRequest):
     """批量提交多个视频处理任务"""
@@ -191,25 +275,73 @@ def batch_process(req: BatchRequest):
     return {"task_ids": task_ids}
 
 
-_HIDDEN_FIELDS = {"cookies", "browser"}
+_HIDDEN_FIELDS = {"cookies", "browser", "_lock", "_subscribers"}
 
 def _safe_task(task: dict) -> dict:
-    """返回任务信息，过滤掉敏感字段"""
+    """返回任务信息，过滤掉敏感字段和内部字段"""
     return {k: v for k, v in task.items() if k not in _HIDDEN_FIELDS}
 
 
+def _safe_task_summary(task: dict) -> dict:
+    """列表视图用的精简任务信息：不含 content（可达数百 KB），
+    完整内容通过单任务接口获取"""
+    return {k: v for k, v in task.items() if k not in _HIDDEN_FIELDS and k != "content"}
+
+
 @app.get("/api/tasks")
-def get_all_tasks():
-    """查询所有任务状态"""
-    return {"tasks": [_safe_task(t) for t in tasks.values()]}
+def get_all_tasks(request: Request, response: Response):
+    """查询所有任务状态（精简视图；版本未变时返回 304，跳过序列化）"""
+    etag = f'"tasks-{_global_version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304)
+    response.headers["ETag"] = etag
+    # 在锁内浅拷贝一份列表再迭代：淘汰线程可能正在 del tasks[...]，
+    # 直接迭代 tasks.values() 会撞上 "dictionary changed size during iteration"
+    with _tasks_lock:
+        snapshot = list(tasks.values())
+    return {"tasks": [_safe_task_summary(t) for t in snapshot]}
 
 
 @app.get("/api/tasks/{task_id}")
-def get_task(task_id: str):
-    """查询单个任务状态"""
+def get_task(task_id: str, request: Request, response: Response):
+    """查询单个任务状态（版本未变时返回 304，跳过序列化）"""
     if task_id not in tasks:
         return {"error": "task not found"}
-    return _safe_task(tasks[task_id])
+    task = tasks[task_id]
+    with task["_lock"]:
+        etag = f'"{task_id}-{task["version"]}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304)
+        snapshot = _safe_task(task)
+    response.headers["ETag"] = etag
+    return snapshot
+
+
+@app.get("/api/tasks/{task_id}/stream")
+async def stream_task(task_id: str):
+    """SSE 推送任务状态：状态一变立刻下发，客户端无需轮询"""
+    if task_id not in tasks:
+        return {"error": "task not found"}
+
+    task = tasks[task_id]
+    queue: asyncio.Queue = asyncio.Queue()
+    with task["_lock"]:
+        task["_subscribers"].add(queue)
+        snapshot = _safe_task(task)
+
+    async def event_stream():
+        try:
+            current = snapshot
+            while True:
+                yield f"data: {json.dumps(current, ensure_ascii=False)}\n\n"
+                if current.get("status") in ("done", "failed"):
+                    break
+                current = await queue.get()
+        finally:
+            with task["_lock"]:
+                task["_subscribers"].discard(queue)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 
 @app.get("/api/health")
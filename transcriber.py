@@ -1,15 +1,28 @@
 # transcriber.py
 import os
+import re
 import time
+import logging
+import random
+import hashlib
 import concurrent.futures
+import httpx
+import numpy as np
 from openai import OpenAI
-from faster_whisper import WhisperModel
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+from faster_whisper.audio import decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
 from pathlib import Path
 
 # 可选模型（从小到大）: tiny (~75MB), base (~150MB), small (~500MB), medium (~1.5GB), large-v3 (~3GB)
 # 模型越大，转录越准确，但下载和运行时间越长
 MODEL_SIZE = "base"
 
+# 可选：预先用 ct2-transformers-converter 离线量化好的本地模型目录（见 README）。
+# CTranslate2 以 mmap 方式加载目录里的权重，加载近乎瞬时，且 uvicorn 多 worker
+# 部署时各进程共享同一份页缓存，不用每个进程各持一份权重。设置后优先于 MODEL_SIZE
+MODEL_PATH = os.environ.get("WHISPER_MODEL_PATH", "")
+
 # 通义千问 API Key（阿里云百炼，新用户每个模型送 100 万 tokens，有效期 90 天）
 # 获取地址：https://bailian.console.aliyun.com/#/api-key
 DASHSCOPE_API_KEY = os.environ.get("DASHSCOPE_API_KEY", "sk-a6291c230f014c7491b3a27a0f347b7f")
@@ -19,6 +32,38 @@ DASHSCOPE_BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
 # 每段发给 LLM 的最大字符数
 CHUNK_SIZE = 8000
 
+# user 消息的固定前缀（预拼好，避免每次调用走 f-string 格式化）
+_USER_CONTENT_PREFIX = "原始文本：\n"
+
+# 逐 segment 的调试输出默认关闭：每条 print 都是一次 stdout 系统调用 + flush，
+# 长音频几百个 segment 会拖慢 Whisper 热循环。设 YT2TEXT_VERBOSE=1 开启
+VERBOSE = bool(os.environ.get("YT2TEXT_VERBOSE"))
+
+# 进度回调的最小间隔（秒）：回调要重建全量文本，逐 segment 调用是 O(N²)
+NOTIFY_INTERVAL = 0.25
+
+# 热路径日志走 logging 而不是 print：生产环境设 YT2TEXT_LOGLEVEL=WARNING
+# 可整体关掉逐段落消息，连格式化开销一起省掉（print 没法按级别关）
+logger = logging.getLogger("yt2text")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.propagate = False
+# 级别名先校验再设置：拼错的环境变量不该让 CLI/服务在 import 时直接崩掉
+_level = os.environ.get("YT2TEXT_LOGLEVEL", "INFO").upper()
+if not isinstance(logging.getLevelName(_level), int):
+    print(f"⚠️  无效的 YT2TEXT_LOGLEVEL={_level!r}，回退 INFO")
+    _level = "INFO"
+logger.setLevel(_level)
+
+
+def _flush_segment_log(lines: list[str]):
+    """把热循环里攒下的调试行一次性写出（单次 emit/flush）"""
+    if lines:
+        logger.info("\n".join(lines))
+        lines.clear()
+
 PROMPT_TEMPLATE = (
     "你是一个文本编辑助手。下面是一段语音转录的原始文本（没有分段）。"
     "请你先判断这段内容是「多人对话」还是「单人独白」，然后按对应格式整理为 Markdown。\n\n"
@@ -36,15 +81,98 @@ PROMPT_TEMPLATE = (
     "3. 直接输出 Markdown 内容，不要用代码块包裹，不要加额外说明\n\n"
 )
 
+# 说话人类型的一次性分类 prompt：回答只有一个字母，调用成本可忽略
+SPEAKER_CLASSIFY_PROMPT = (
+    "判断下面的语音转录文本是「多人对话」还是「单人独白」。\n"
+    "多人对话回答 A，单人独白回答 B。只回答一个字母，不要输出任何其他内容。\n"
+)
+
+# PROMPT_TEMPLATE 的单分支版本：分类确定后，后续各块只发匹配分支，
+# system prompt 的 token 量减近一半（网络字节与服务端处理同步下降）
+DIALOGUE_PROMPT = (
+    "你是一个文本编辑助手。下面是一段多人对话的语音转录原始文本（没有分段）。"
+    "请按以下要求整理为 Markdown：\n"
+    "1. 识别不同的说话人，用 **说话人A：**、**说话人B：** 等标记（如果能从内容推断出名字则用名字）\n"
+    "2. 每次说话人切换时换行，如实记录每个人说的话\n"
+    "3. 不需要添加小标题，不需要合并段落，忠实还原对话过程\n"
+    "4. 将所有繁体中文转换为简体中文\n"
+    "5. 除了繁简转换外，不要修改、删除或添加任何原文内容\n"
+    "6. 直接输出 Markdown 内容，不要用代码块包裹，不要加额外说明\n"
+)
+
+MONOLOGUE_PROMPT = (
+    "你是一个文本编辑助手。下面是一段单人独白的语音转录原始文本（没有分段）。"
+    "请按以下要求整理为 Markdown：\n"
+    "1. 按照话题和逻辑转折来分段，不要机械地按固定字数分\n"
+    "2. 用 ## 为每个主要话题段落添加小标题（小标题由你根据内容总结）\n"
+    "3. 段落之间用空行隔开\n"
+    "4. 将所有繁体中文转换为简体中文\n"
+    "5. 除了繁简转换外，不要修改、删除或添加任何原文内容\n"
+    "6. 直接输出 Markdown 内容，不要用代码块包裹，不要加额外说明\n"
+)
+
 # Whisper 模型单例缓存
 _whisper_model = None
 
+
+def _detect_device() -> tuple[str, str]:
+    """自动检测运行设备与计算精度
+
+    精度可用 WHISPER_QUANT 显式指定（int8 / int8_float16 / int8_bfloat16 等）；
+    默认 "auto" 让 CTranslate2 自选当前硬件最快的类型（如支持 AVX512-VNNI 的
+    CPU 用 int8_float32，GPU 用 int8_float16）
+    """
+    quant = os.environ.get("WHISPER_QUANT", "auto")
+    try:
+        import ctranslate2
+        if ctranslate2.get_cuda_device_count() > 0:
+            return "cuda", "float16" if quant == "auto" else quant
+    except Exception:
+        pass
+    return "cpu", quant
+
+
+def _load_waveform(audio_path: Path):
+    """把音频一次解码成 16kHz 单声道 float32 波形（faster-whisper 自带解码器）
+
+    直接把 ndarray 传给 transcribe：webm/m4a 只过一遍 PyAV 解码，
+    transcribe 内部不用再按路径重新打开文件，波形也可供 VAD 等预处理复用
+    """
+    return decode_audio(str(audio_path), sampling_rate=16000)
+
+
+def _batch_size_for_model() -> int:
+    """按模型大小自适应批量推理的 batch_size，大模型降低批量防止吃光内存"""
+    name = (MODEL_PATH or MODEL_SIZE).lower()
+    if "large" in name:
+        return 2
+    if "medium" in name:
+        return 4
+    return 8
+
+
 def _get_whisper_model():
     """加载并缓存 Whisper 模型，只在首次调用时加载"""
     global _whisper_model
     if _whisper_model is None:
-        print(f"📦 首次加载 Whisper 模型 ({MODEL_SIZE})，请稍候...")
-        _whisper_model = WhisperModel(MODEL_SIZE, device="cpu", compute_type="int8")
+        device, compute_type = _detect_device()
+        model_ref = MODEL_PATH or MODEL_SIZE
+        # 编码器是计算密集的矩阵乘法，OpenMP 线程数直接决定 CPU 转录速度；
+        # 留一个核给流水线里的 LLM 网络线程，可用 WHISPER_CPU_THREADS 覆盖
+        cpu_threads = int(os.environ.get("WHISPER_CPU_THREADS", 0)) or max(1, (os.cpu_count() or 2) - 1)
+        print(f"📦 首次加载 Whisper 模型 ({model_ref}, {device}/{compute_type}, {cpu_threads} 线程)，请稍候...")
+        try:
+            _whisper_model = WhisperModel(
+                model_ref, device=device, compute_type=compute_type,
+                cpu_threads=cpu_threads, num_workers=2,
+            )
+        except ValueError:
+            # 旧版 CTranslate2 或硬件不支持指定精度时，退回保守的 int8
+            print(f"   ⚠️ 当前环境不支持 compute_type={compute_type}，回退 int8")
+            _whisper_model = WhisperModel(
+                model_ref, device=device, compute_type="int8",
+                cpu_threads=cpu_threads, num_workers=2,
+            )
         print("✅ Whisper 模型加载完成（已缓存）")
     return _whisper_model
 
@@ -76,56 +204,104 @@ STRUCTURE_PROMPT = (
     "3. 只输出上述格式，不要加任何其他内容\n"
 )
 
+# 各 prompt 的预处理版本：模块加载时 rstrip 一次，省掉每次 API 调用的重复分配
+_PROMPT_TEMPLATE_STRIPPED = PROMPT_TEMPLATE.rstrip()
+_SEGMENT_PROMPT_STRIPPED = SEGMENT_PROMPT.rstrip()
+_STRUCTURE_PROMPT_STRIPPED = STRUCTURE_PROMPT.rstrip()
+_SPEAKER_CLASSIFY_PROMPT_STRIPPED = SPEAKER_CLASSIFY_PROMPT.rstrip()
+_DIALOGUE_PROMPT_STRIPPED = DIALOGUE_PROMPT.rstrip()
+_MONOLOGUE_PROMPT_STRIPPED = MONOLOGUE_PROMPT.rstrip()
+
+
+# 结构标题响应的行格式："段落编号:标题"（编号前缀"段落"可有可无，冒号全半角均可）
+_HEADER_RE = re.compile(r"^\s*(?:段落)?\s*(\d+)\s*[:：]\s*(.+?)\s*$", re.M)
 
-def _split_text(text: str, chunk_size: int = CHUNK_SIZE) -> list[str]:
-    """将长文本按句号/问号/感叹号等断句点切分为多段，每段不超过 chunk_size 字符"""
-    if len(text) <= chunk_size:
-        return [text]
-
-    chunks = []
-    start = 0
-
-    while start < len(text):
-        # 如果剩余文本不超过限制，直接收入
-        if start + chunk_size >= len(text):
-            chunks.append(text[start:])
-            break
-
-        # 在 chunk_size 范围内从后往前找断句点
-        end = start + chunk_size
-        split_pos = -1
-        for sep in ["。", "？", "！", ".", "?", "!", "；", "\n"]:
-            pos = text.rfind(sep, start, end)
-            if pos > split_pos:
-                split_pos = pos
-
-        if split_pos > start:
-            # 包含断句符号本身
-            chunks.append(text[start:split_pos + 1])
-            start = split_pos + 1
+
+def _write_transcript(path: Path, content):
+    """落盘最终转录文件：大缓冲写入，结束时 fsync 确保持久化
+
+    content 可以是字符串，也可以是片段列表——后者用 writelines 逐片写进
+    文件缓冲，省掉先拼出整块大字符串的那次分配
+    """
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        if isinstance(content, str):
+            f.write(content)
         else:
-            # 找不到断句点，硬切
-            chunks.append(text[start:end])
-            start = end
+            f.writelines(content)
+        f.flush()
+        os.fsync(f.fileno())
+
 
-    return chunks
+# LLM 客户端单例缓存（避免每次调用重建客户端和底层连接池）
+_llm_client = None
 
 
 def _get_llm_client() -> OpenAI:
-    """创建通义千问 API 客户端（阿里云百炼 DashScope）"""
-    api_key = os.environ.get("DASHSCOPE_API_KEY", DASHSCOPE_API_KEY)
-    if not api_key:
-        raise RuntimeError(
-            "未设置通义千问 API Key。请前往 https://bailian.console.aliyun.com/#/api-key 获取，"
-            "然后设置环境变量 DASHSCOPE_API_KEY 或在 transcriber.py 中填写。"
+    """创建并缓存通义千问 API 客户端（阿里云百炼 DashScope）"""
+    global _llm_client
+    if _llm_client is None:
+        api_key = os.environ.get("DASHSCOPE_API_KEY", DASHSCOPE_API_KEY)
+        if not api_key:
+            raise RuntimeError(
+                "未设置通义千问 API Key。请前往 https://bailian.console.aliyun.com/#/api-key 获取，"
+                "然后设置环境变量 DASHSCOPE_API_KEY 或在 transcriber.py 中填写。"
+            )
+        # 所有并发格式化线程共享一个连接池；HTTP/2 多路复用让并发请求
+        # 走同一条 TCP/TLS 会话，省掉每次 100-300ms 的握手
+        _llm_client = OpenAI(
+            api_key=api_key,
+            base_url=DASHSCOPE_BASE_URL,
+            http_client=httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+                timeout=httpx.Timeout(90.0, connect=10.0),
+            ),
         )
-    return OpenAI(api_key=api_key, base_url=DASHSCOPE_BASE_URL)
+    return _llm_client
+
+
+# 格式化结果缓存：相同 prompt+文本直接复用结果，跳过 ~2s 的网络往返。
+# 重复命中并不罕见——系列视频的片头片尾口头禅、VAD 切出的重复音乐段、
+# 以及失败后对同一段落的重跑。FIFO 淘汰，仅进程内（不为此引入磁盘缓存依赖）
+_LLM_CACHE_MAX = 2048
+_llm_cache: dict[str, str] = {}
+
+
+def _llm_cache_key(system_prompt: str, text: str) -> str:
+    return hashlib.blake2b(
+        (system_prompt + "\x00" + text).encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """计算重试等待时长
+
+    限流时服务端的 Retry-After 最准确，优先尊重；否则用指数退避 + 随机抖动
+    （抖动避免并发 worker 同时撞限流后又同时重试）。上限 60s。
+    """
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(60.0, float(retry_after))
+            except ValueError:
+                pass
+    return min(60.0, 2 ** attempt + random.uniform(0, 1))
 
 
 def _call_llm(client: OpenAI, text: str, part_info: str = "", prompt_template: str = None) -> str:
-    """调用通义千问 API 格式化一段文本，带重试"""
-    system_prompt = (prompt_template or PROMPT_TEMPLATE).rstrip()
-    user_content = f"原始文本：\n{text}"
+    """调用通义千问 API 格式化一段文本，带重试
+
+    prompt_template 传入时应为已 rstrip 的常量（_*_STRIPPED）
+    """
+    system_prompt = prompt_template or _PROMPT_TEMPLATE_STRIPPED
+    user_content = _USER_CONTENT_PREFIX + text
+
+    cache_key = _llm_cache_key(system_prompt, text)
+    cached = _llm_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
     max_retries = 5
     for attempt in range(1, max_retries + 1):
@@ -139,17 +315,27 @@ def _call_llm(client: OpenAI, text: str, part_info: str = "", prompt_template: s
                 temperature=0,
                 timeout=90,
             )
-            return response.choices[0].message.content.strip()
+            result = response.choices[0].message.content.strip()
         except Exception as e:
             if attempt < max_retries:
-                # 网络错误用更长等待，其他错误短等待
-                is_network = "connect" in str(e).lower() or "timeout" in str(e).lower()
-                wait = attempt * 10 if is_network else attempt * 5
-                print(f"   ⏳ {part_info}第 {attempt} 次请求失败（{e}），{wait}s 后重试...")
+                wait = _retry_delay(e, attempt)
+                print(f"   ⏳ {part_info}第 {attempt} 次请求失败（{e}），{wait:.1f}s 后重试...")
                 time.sleep(wait)
-            else:
-                print(f"   ⚠️ {part_info}请求失败: {e}")
-                raise
+                continue
+            print(f"   ⚠️ {part_info}请求失败: {e}")
+            raise
+        # 缓存写入放在重试 try 之外：并发线程同时触发淘汰时两边可能挑中
+        # 同一个最旧 key，pop 带默认值落空即可——缓存自身的小竞态不该把
+        # 已经成功拿到的响应当成请求失败去重试
+        if len(_llm_cache) >= _LLM_CACHE_MAX:
+            _llm_cache.pop(next(iter(_llm_cache)), None)
+        _llm_cache[cache_key] = result
+        return result
+
+
+def _make_preview(text: str) -> str:
+    """段落摘要：前 150 字压成单行"""
+    return text[:150].replace("\n", " ").strip()
 
 
 def _generate_section_headers(client: OpenAI, paragraphs: list[dict]) -> dict[int, str]:
@@ -160,98 +346,48 @@ def _generate_section_headers(client: OpenAI, paragraphs: list[dict]) -> dict[in
     if len(paragraphs) < 3:
         return {}
 
-    # 构建段落摘要：取每段前 150 字
+    # 构建段落摘要：优先用格式化完成时缓存好的 preview
     summaries = []
     for i, p in enumerate(paragraphs):
-        text = (p["formatted"] or p["raw"]).strip()
-        preview = text[:150].replace("\n", " ").strip()
+        preview = p.get("preview") or _make_preview(p["formatted"] or p["raw"])
         summaries.append(f"【段落{i+1}】{preview}")
 
     outline = "\n".join(summaries)
 
-    result = _call_llm(client, outline, part_info="结构化 ", prompt_template=STRUCTURE_PROMPT)
+    result = _call_llm(client, outline, part_info="结构化 ", prompt_template=_STRUCTURE_PROMPT_STRIPPED)
 
-    # 解析 AI 返回的 "段落编号:标题" 格式
+    # 解析 AI 返回的 "段落编号:标题" 格式：一次 finditer 扫完整个响应
     headers = {}
-    for line in result.strip().split("\n"):
-        line = line.strip()
-        if not line or ":" not in line and "：" not in line:
-            continue
-        # 支持半角和全角冒号
-        sep = "：" if "：" in line else ":"
-        parts = line.split(sep, 1)
-        try:
-            num_str = parts[0].replace("段落", "").strip()
-            idx = int(num_str) - 1  # 转为 0-indexed
-            title = parts[1].strip()
-            if 0 <= idx < len(paragraphs) and title:
-                headers[idx] = title
-        except (ValueError, IndexError):
-            continue
+    for m in _HEADER_RE.finditer(result):
+        idx = int(m.group(1)) - 1  # 转为 0-indexed
+        if 0 <= idx < len(paragraphs):
+            headers[idx] = m.group(2)
 
     return headers
 
 
-def _format_with_llm(raw_text: str) -> str:
-    """使用通义千问按逻辑内容对文本进行分段，超长文本自动分段处理"""
-    client = _get_llm_client()
-
-    chunks = _split_text(raw_text)
-
-    if len(chunks) == 1:
-        print("✨ 正在用通义千问 AI 按逻辑内容分段...")
-        return _call_llm(client, chunks[0])
-    else:
-        print(f"✨ 文本较长（{len(raw_text)} 字），分 {len(chunks)} 段发送给通义千问 AI...")
-        results = []
-        for i, chunk in enumerate(chunks, 1):
-            print(f"   📎 处理第 {i}/{len(chunks)} 段（{len(chunk)} 字）...")
-            result = _call_llm(client, chunk, part_info=f"第{i}段 ")
-            results.append(result)
-        return "\n\n".join(results)
-
-
-def transcribe_audio(audio_path: Path, on_progress=None) -> str:
-    """第一阶段：用 Whisper 将音频转为原始文本，支持逐段回调"""
-    model = _get_whisper_model()
-    print("✅ 模型就绪，开始转录...")
-
-    segments, info = model.transcribe(str(audio_path), language="zh")
-
-    # 语音中超过 GAP_THRESHOLD 秒的停顿会自动分段（插入空行）
-    GAP_THRESHOLD = 1.0
-    raw_parts = []
-    prev_end = 0.0
-    for segment in segments:
-        text = segment.text.strip()
-        if text:
-            gap = segment.start - prev_end
-            if raw_parts and gap >= GAP_THRESHOLD:
-                raw_parts.append("\n\n")
-                print(f"  --- 停顿 {gap:.1f}s，分段 ---")
-            print(f"  [{segment.start:.1f}s - {segment.end:.1f}s] {text}")
-            raw_parts.append(text)
-            prev_end = segment.end
-            if on_progress:
-                on_progress("".join(raw_parts))
-
-    raw_text = "".join(raw_parts)
-    print(f"\n📝 转录完成，共 {len(raw_text)} 字")
-    return raw_text
-
+def _classify_speakers(client: OpenAI, text: str) -> str | None:
+    """用一次极小的 LLM 调用判断文本是多人对话("A")还是单人独白("B")
 
-def format_transcript(raw_text: str, audio_path: Path, output_dir: str = "output") -> Path:
-    """第二阶段：用通义千问 AI 对原始文本进行逻辑分段并生成 Markdown"""
-    transcript_path = Path(output_dir) / f"{audio_path.stem}.md"
-
-    formatted_text = _format_with_llm(raw_text)
-
-    title = audio_path.stem.replace("_", " ")
-
-    with open(transcript_path, "w", encoding="utf-8") as f:
-        f.write(f"# {title}\n\n{formatted_text}\n")
-
-    return transcript_path
+    只看前 1000 字、只生成 1 个 token，失败时返回 None 由调用方退回通用 prompt
+    """
+    try:
+        response = client.chat.completions.create(
+            model=DASHSCOPE_MODEL,
+            messages=[
+                {"role": "system", "content": _SPEAKER_CLASSIFY_PROMPT_STRIPPED},
+                {"role": "user", "content": text[:1000]},
+            ],
+            temperature=0,
+            max_tokens=1,
+            timeout=20,
+        )
+        answer = response.choices[0].message.content.strip().upper()
+        if answer.startswith(("A", "B")):
+            return answer[0]
+    except Exception as e:
+        print(f"   ⚠️ 说话人分类失败，使用通用 prompt: {e}")
+    return None
 
 
 def transcribe_and_format(audio_path: Path, on_update=None, output_dir: str = "output", timing: dict | None = None):
@@ -274,188 +410,420 @@ def transcribe_and_format(audio_path: Path, on_update=None, output_dir: str = "o
 
     client = _get_llm_client()
 
-    t0 = time.time()
-    model = _get_whisper_model()
-    timing["model_load"] = round(time.time() - t0, 1)
-    print(f"⏱️ 模型加载耗时: {timing['model_load']}s")
-    print("✅ 模型就绪，开始转录+格式化流水线...")
-
-    t_whisper_start = time.time()
-    segments, _info = model.transcribe(
-        str(audio_path), language="zh",
-        beam_size=1,        # 贪心解码，大幅提速，中文语音质量损失极小
-        vad_filter=True,    # 跳过静音/非语音段，减少无效转录
+    # 格式化并发数可用 LLM_CONCURRENCY 覆盖（如 API 限流收紧时调低）
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=int(os.environ.get("LLM_CONCURRENCY", "5"))
+    )
+    # 预热 LLM 连接：趁模型加载的空档把 TCP+TLS+HTTP/2 会话先建好，
+    # 第一个真实段落提交时连接池已是热的，省掉首请求 100-300ms 的握手
+    executor.submit(
+        client.chat.completions.create,
+        model=DASHSCOPE_MODEL,
+        messages=[{"role": "user", "content": "ok"}],
+        max_tokens=1, timeout=20,
     )
 
-    GAP_THRESHOLD = 1.0
-    MAX_PARAGRAPH_CHARS = 500   # 通义千问速率限制宽松（3万RPM），可细粒度分段提升响应速度
-
-    # ── 段落状态 ──
-    paragraphs = []         # [{"raw": str, "formatted": str|None}, ...]
-    current_parts = []      # 当前正在转录的段落片段
-    prev_end = 0.0
-    formatted_count = 0
-
-    # ── 章节标题映射（由 AI 在格式化完成后自动生成）──
-    chapter_headers = {}    # {paragraph_index: "标题"}
-
-    executor = concurrent.futures.ThreadPoolExecutor(max_workers=5)
-    pending_futures = {}    # {paragraph_index: Future}
-
-    def _build_content():
-        """组装当前应显示的完整内容（含章节标题）"""
-        parts = []
-        for i, p in enumerate(paragraphs):
-            if i in chapter_headers:
-                parts.append(f"## {chapter_headers[i]}")
-            parts.append(p["formatted"] if p["formatted"] else p["raw"])
-        if current_parts:
-            parts.append("".join(current_parts))
-        return f"# {title}\n\n" + "\n\n".join(parts)
-
-    def _check_futures():
-        """检查已完成的通义千问格式化任务"""
-        nonlocal formatted_count
-        changed = False
-        for idx in list(pending_futures.keys()):
-            future = pending_futures[idx]
-            if future.done():
-                try:
-                    paragraphs[idx]["formatted"] = future.result()
-                except Exception as e:
-                    print(f"  ⚠️ 段落 {idx+1} 格式化失败: {e}")
-                formatted_count += 1
-                changed = True
-                del pending_futures[idx]
-        return changed
-
-    def _submit_paragraph():
-        """将当前段落提交给通义千问格式化"""
-        if not current_parts:
-            return
-        raw = "".join(current_parts)
-        idx = len(paragraphs)
-        paragraphs.append({"raw": raw, "formatted": None})
-        current_parts.clear()
-        future = executor.submit(
-            _call_llm, client, raw,
-            part_info=f"段落{idx+1} ",
-            prompt_template=SEGMENT_PROMPT,
+    try:
+        t0 = time.time()
+        model = _get_whisper_model()
+        timing["model_load"] = round(time.time() - t0, 1)
+        print(f"⏱️ 模型加载耗时: {timing['model_load']}s")
+        print("✅ 模型就绪，开始转录+格式化流水线...")
+
+        t_whisper_start = time.time()
+        GAP_THRESHOLD = 1.0
+        MAX_PARAGRAPH_CHARS = 500   # 通义千问速率限制宽松（3万RPM），可细粒度分段提升响应速度
+        MAX_PARAGRAPH_CHARS_FIRST = 150  # 第一段提前切出，让格式化流水线尽早转起来
+        SAMPLE_RATE = 16000
+        VAD_PAD_MS = 200            # VAD 给每个语音块两侧补的余量
+
+        # ── VAD 预切分：解码开始前就算好段落边界 ──
+        # 在波形上跑一遍 silero VAD，段落间隔（≥GAP_THRESHOLD 的静音）用一次
+        # NumPy 向量化比较全部找出来，不再在解码循环里逐 segment 比对 gap；
+        # 相邻块各被 pad 吃掉一段静音，比较阈值相应扣除
+        audio = _load_waveform(audio_path)
+        speech_chunks = get_speech_timestamps(
+            audio,
+            VadOptions(
+                min_silence_duration_ms=500,
+                speech_pad_ms=VAD_PAD_MS,
+                # 单块不超过 30s 解码窗口：clip_timestamps 路径会截断超窗的单块
+                max_speech_duration_s=30,
+            ),
         )
-        pending_futures[idx] = future
-        print(f"  📤 段落 {idx+1} 已提交通义千问（{len(raw)} 字）")
-
-    def _notify():
-        if on_update:
+        if speech_chunks:
+            chunk_starts = np.array([c["start"] for c in speech_chunks])
+            chunk_ends = np.array([c["end"] for c in speech_chunks])
+            gaps = chunk_starts[1:] - chunk_ends[:-1]
+            min_gap = int((GAP_THRESHOLD - 2 * VAD_PAD_MS / 1000) * SAMPLE_RATE)
+            breaks = np.flatnonzero(gaps >= min_gap) + 1
+            bounds = [0, *breaks.tolist(), len(speech_chunks)]
+            # 每个 span 除首尾采样点外，还带上段内各语音块相对 span 起点的秒数区间：
+            # 解码时作为 clip_timestamps 传入（≥30s 的音频不传会直接 RuntimeError），
+            # 顺便让解码器复用这次 VAD 的结果、不再自己跑一遍
+            spans = []
+            for a, b in zip(bounds, bounds[1:]):
+                span_start = int(chunk_starts[a])
+                clips = [
+                    {"start": (int(chunk_starts[k]) - span_start) / SAMPLE_RATE,
+                     "end": (int(chunk_ends[k]) - span_start) / SAMPLE_RATE}
+                    for k in range(a, b)
+                ]
+                spans.append((span_start, int(chunk_ends[b - 1]), clips))
+            vad_filter = False   # clip_timestamps 已给出语音区间，无需内置 VAD
+            print(f"🔇 VAD 预切分: {len(speech_chunks)} 个语音块 → {len(spans)} 个段落")
+        else:
+            # VAD 一个语音块都没找到（罕见）：整段照常解码，交给内置 VAD 兜底
+            spans = [(0, len(audio), None)]
+            vad_filter = True
+
+        # 批量推理：编码器按 batch 吃 30s 窗口，比逐段解码快数倍
+        pipeline = BatchedInferencePipeline(model=model)
+
+        # ── 段落状态 ──
+        paragraphs = []         # [{"raw": str, "formatted": str|None}, ...]
+        current_parts = []      # 当前正在转录的段落片段
+        current_len = 0         # current_parts 的总字符数，随 append 增量维护
+        formatted_count = 0
+
+        # ── 章节标题映射（由 AI 在格式化完成后自动生成）──
+        chapter_headers = {}    # {paragraph_index: "标题"}
+
+        pending_futures = {}    # {paragraph_index: Future}
+
+        # _build_content 的前缀缓存：段落一旦格式化完成，渲染结果就不会再变，
+        # 固化进缓存后每次只需重建未定稿的尾部，避免逐 segment 全量重建（O(N²)）。
+        # 章节标题出现时（流程尾声）缓存整体失效一次，代价可忽略
+        content_cache = {"count": 0, "parts": [f"# {title}"], "headers": 0}
+
+        def _build_parts() -> list[str]:
+            """组装当前应显示的内容片段列表（含章节标题）"""
+            if len(chapter_headers) != content_cache["headers"]:
+                content_cache.update(count=0, parts=[f"# {title}"], headers=len(chapter_headers))
+            parts = content_cache["parts"]
+            i = content_cache["count"]
+            while i < len(paragraphs) and paragraphs[i]["formatted"] is not None:
+                if i in chapter_headers:
+                    parts.append(f"## {chapter_headers[i]}")
+                parts.append(paragraphs[i]["formatted"])
+                i += 1
+            content_cache["count"] = i
+            tail = []
+            for j in range(i, len(paragraphs)):
+                if j in chapter_headers:
+                    tail.append(f"## {chapter_headers[j]}")
+                tail.append(paragraphs[j]["formatted"] or paragraphs[j]["raw"])
+            if current_parts:
+                tail.append("".join(current_parts))
+            return parts + tail
+
+        def _build_content():
+            """当前应显示的完整内容字符串，全程 list + 单次 join"""
+            return "\n\n".join(_build_parts())
+
+        def _check_futures():
+            """检查已完成的通义千问格式化任务"""
+            nonlocal formatted_count
+            changed = False
+            for idx in list(pending_futures.keys()):
+                future = pending_futures[idx]
+                if future.done():
+                    try:
+                        result = future.result()
+                        paragraphs[idx]["formatted"] = result
+                        # formatted 定稿的同时算好摘要，后续结构标题/UI 预览直接复用
+                        paragraphs[idx]["preview"] = _make_preview(result)
+                    except Exception as e:
+                        logger.warning(f"  ⚠️ 段落 {idx+1} 格式化失败: {e}")
+                    formatted_count += 1
+                    changed = True
+                    del pending_futures[idx]
+            return changed
+
+        def _submit_paragraph():
+            """将当前段落提交给通义千问格式化"""
+            nonlocal current_len
+            if not current_parts:
+                return
+            raw = "".join(current_parts)
+            idx = len(paragraphs)
+            paragraphs.append({"raw": raw, "formatted": None, "preview": None})
+            current_parts.clear()
+            current_len = 0
+            future = executor.submit(
+                _call_llm, client, raw,
+                part_info=f"段落{idx+1} ",
+                prompt_template=_SEGMENT_PROMPT_STRIPPED,
+            )
+            pending_futures[idx] = future
+            logger.info(f"  📤 段落 {idx+1} 已提交通义千问（{len(raw)} 字）")
+
+        last_notify = 0.0
+
+        def _notify(force: bool = False):
+            nonlocal last_notify
+            if not on_update:
+                return
+            # 热循环里的通知节流合并；段落级事件（提交/完成）强制推送
+            if not force and time.monotonic() - last_notify < NOTIFY_INTERVAL:
+                return
+            last_notify = time.monotonic()
             on_update(_build_content(), formatted_count, len(paragraphs))
 
-    # ── 主循环：Whisper 转录 ──
-    for segment in segments:
-        text = segment.text.strip()
-        if not text:
-            continue
+        # ── 主循环：按 VAD 段落逐段解码 ──
+        # 段落边界已由 VAD 预先定好：每个 span 只含段内语音，解码完直接提交
+        # 格式化；段内只需检查字数上限，不再逐 segment 计算停顿
+        log_lines = []
+        for span_start, span_end, clips in spans:
+            span_offset = span_start / SAMPLE_RATE
+            segments, _info = pipeline.transcribe(
+                audio[span_start:span_end], language="zh",
+                batch_size=_batch_size_for_model(),
+                beam_size=1,        # 贪心解码，大幅提速，中文语音质量损失极小
+                vad_filter=vad_filter,
+                clip_timestamps=clips,              # 段内语音块（相对秒），兜底路径为 None
+                word_timestamps=False,              # 分段只需段级时间戳，跳过词级对齐
+                condition_on_previous_text=False,   # 批量推理各窗口独立，不拼上文 prompt
+            )
+            for segment in segments:
+                text = segment.text.strip()
+                if not text:
+                    continue
+
+                # 段落过长 → 段内二次切分
+                max_chars = MAX_PARAGRAPH_CHARS if paragraphs else MAX_PARAGRAPH_CHARS_FIRST
+                if current_parts and current_len >= max_chars:
+                    logger.info(f"  --- 已达 {current_len} 字，分段 ---")
+                    _submit_paragraph()
+
+                # 顺便检查已完成的格式化
+                _check_futures()
+
+                if VERBOSE:
+                    log_lines.append(
+                        f"  [{span_offset + segment.start:.1f}s - {span_offset + segment.end:.1f}s] {text}"
+                    )
+                current_parts.append(text)
+                current_len += len(text)
 
-        gap = segment.start - prev_end
-        current_len = sum(len(p) for p in current_parts)
+                _notify()
 
-        # 检测到停顿 或 段落过长 → 切段 → 提交格式化
-        if current_parts and (gap >= GAP_THRESHOLD or current_len >= MAX_PARAGRAPH_CHARS):
-            reason = f"停顿 {gap:.1f}s" if gap >= GAP_THRESHOLD else f"已达 {current_len} 字"
-            print(f"  --- {reason}，分段 ---")
-            _submit_paragraph()
+            # 一个 VAD 段落解码完毕 → 提交格式化
+            if current_parts:
+                logger.info("  --- 段落解码完毕，分段 ---")
+                _submit_paragraph()
+                _check_futures()
+                _notify(force=True)
 
-        # 顺便检查已完成的格式化
         _check_futures()
-
-        print(f"  [{segment.start:.1f}s - {segment.end:.1f}s] {text}")
-        current_parts.append(text)
-        prev_end = segment.end
-
-        _notify()
-
-    # ── 提交最后一段 ──
-    _submit_paragraph()
-    _check_futures()
-    _notify()
-
-    timing["whisper"] = round(time.time() - t_whisper_start, 1)
-    print(f"⏱️ Whisper 转录耗时: {timing['whisper']}s（{len(paragraphs)} 个段落）")
-
-    # ── 等待所有格式化完成 ──
-    t_format_wait = time.time()
-    print("  ⏳ 等待剩余通义千问格式化完成...")
-    for idx in sorted(pending_futures.keys()):
-        future = pending_futures[idx]
-        try:
-            paragraphs[idx]["formatted"] = future.result()
-        except Exception as e:
-            print(f"  ⚠️ 段落 {idx+1} 格式化失败: {e}")
-        formatted_count += 1
-        _notify()
-
-    pending_futures.clear()
-    timing["ai_format"] = round(time.time() - t_format_wait, 1)
-    print(f"⏱️ AI 格式化等待耗时: {timing['ai_format']}s")
-
-    # ── 重试所有格式化失败的段落 ──
-    t_retry = time.time()
-    failed_indices = [i for i, p in enumerate(paragraphs) if p["formatted"] is None]
-    if failed_indices:
-        print(f"\n🔄 {len(failed_indices)} 个段落格式化失败，等待 15s 后集中重试...")
-        time.sleep(15)
-        for idx in failed_indices:
+        _notify(force=True)
+        _flush_segment_log(log_lines)
+
+        timing["whisper"] = round(time.time() - t_whisper_start, 1)
+        print(f"⏱️ Whisper 转录耗时: {timing['whisper']}s（{len(paragraphs)} 个段落）")
+
+        # ── 等待所有格式化完成 ──
+        t_format_wait = time.time()
+        print("  ⏳ 等待剩余通义千问格式化完成...")
+        # 按完成顺序收结果：哪段先格式化完就先推给 UI，不被最慢的前置段落卡住
+        #（段落顺序由 paragraphs 列表保证，收取顺序无关紧要）
+        future_to_idx = {f: i for i, f in pending_futures.items()}
+        for future in concurrent.futures.as_completed(future_to_idx):
+            idx = future_to_idx[future]
             try:
-                print(f"  🔄 重试段落 {idx+1}（{len(paragraphs[idx]['raw'])} 字）...")
-                result = _call_llm(client, paragraphs[idx]["raw"],
-                                   f"段落{idx+1} ", SEGMENT_PROMPT)
+                result = future.result()
                 paragraphs[idx]["formatted"] = result
-                print(f"  ✅ 段落 {idx+1} 重试成功")
-                _notify()
+                paragraphs[idx]["preview"] = _make_preview(result)
             except Exception as e:
-                print(f"  ❌ 段落 {idx+1} 重试仍然失败: {e}")
-        # 二次重试仍失败的段落
-        still_failed = [i for i in failed_indices if paragraphs[i]["formatted"] is None]
-        if still_failed:
-            print(f"  ⚠️ 仍有 {len(still_failed)} 个段落未能格式化，将使用原始文本")
-
-    timing["retry"] = round(time.time() - t_retry, 1)
-    if failed_indices:
-        print(f"⏱️ 重试耗时: {timing['retry']}s")
-
-    executor.shutdown(wait=False)
-
-    # ── 用 AI 自动分析内容，生成结构化标题 ──
-    t_structure = time.time()
-    if len(paragraphs) >= 3:
-        print("  📑 正在用 AI 分析内容，生成结构标题...")
-        try:
-            ai_headers = _generate_section_headers(client, paragraphs)
-            if ai_headers:
-                chapter_headers.update(ai_headers)
-                print(f"  ✅ AI 生成了 {len(ai_headers)} 个结构标题:")
-                for idx in sorted(ai_headers):
-                    print(f"     段落 {idx+1}: {ai_headers[idx]}")
-                _notify()
-            else:
-                print("  ℹ️ AI 未能生成有效的结构标题")
-        except Exception as e:
-            print(f"  ⚠️ 结构标题生成失败（不影响内容）: {e}")
+                print(f"  ⚠️ 段落 {idx+1} 格式化失败: {e}")
+            formatted_count += 1
+            _notify(force=True)
+
+        pending_futures.clear()
+        timing["ai_format"] = round(time.time() - t_format_wait, 1)
+        print(f"⏱️ AI 格式化等待耗时: {timing['ai_format']}s")
+
+        # ── 重试所有格式化失败的段落 ──
+        t_retry = time.time()
+        failed_indices = [i for i, p in enumerate(paragraphs) if p["formatted"] is None]
+        if failed_indices:
+            print(f"\n🔄 {len(failed_indices)} 个段落格式化失败，等待 15s 后集中重试...")
+            time.sleep(15)
+            for idx in failed_indices:
+                try:
+                    print(f"  🔄 重试段落 {idx+1}（{len(paragraphs[idx]['raw'])} 字）...")
+                    result = _call_llm(client, paragraphs[idx]["raw"],
+                                       f"段落{idx+1} ", _SEGMENT_PROMPT_STRIPPED)
+                    paragraphs[idx]["formatted"] = result
+                    paragraphs[idx]["preview"] = _make_preview(result)
+                    print(f"  ✅ 段落 {idx+1} 重试成功")
+                    _notify(force=True)
+                except Exception as e:
+                    print(f"  ❌ 段落 {idx+1} 重试仍然失败: {e}")
+            # 二次重试仍失败的段落
+            still_failed = [i for i in failed_indices if paragraphs[i]["formatted"] is None]
+            if still_failed:
+                print(f"  ⚠️ 仍有 {len(still_failed)} 个段落未能格式化，将使用原始文本")
+
+        timing["retry"] = round(time.time() - t_retry, 1)
+        if failed_indices:
+            print(f"⏱️ 重试耗时: {timing['retry']}s")
+
+
+        # ── 用 AI 自动分析内容，生成结构化标题 ──
+        t_structure = time.time()
+        # 全文太短（如预告片、短视频）没有划分章节的意义，省掉一次 LLM 调用
+        total_chars = sum(len(p["raw"]) for p in paragraphs)
+        if len(paragraphs) >= 3 and total_chars >= 2000:
+            print("  📑 正在用 AI 分析内容，生成结构标题...")
+            try:
+                ai_headers = _generate_section_headers(client, paragraphs)
+                if ai_headers:
+                    chapter_headers.update(ai_headers)
+                    print(f"  ✅ AI 生成了 {len(ai_headers)} 个结构标题:")
+                    for idx in sorted(ai_headers):
+                        print(f"     段落 {idx+1}: {ai_headers[idx]}")
+                    _notify(force=True)
+                else:
+                    print("  ℹ️ AI 未能生成有效的结构标题")
+            except Exception as e:
+                print(f"  ⚠️ 结构标题生成失败（不影响内容）: {e}")
+
+        timing["structure"] = round(time.time() - t_structure, 1)
+        if timing["structure"] > 0.1:
+            print(f"⏱️ 结构标题生成耗时: {timing['structure']}s")
+
+        # ── 保存最终文件 ──
+        # 返回值（UI 需要完整字符串）只 join 一次；落盘走 writelines 写小片段，
+        # 不再为文件内容额外拼一份大字符串
+        final_parts = _build_parts()
+        final_content = "\n\n".join(final_parts) + "\n"
+        transcript_path = Path(output_dir) / f"{audio_path.stem}.md"
+        pieces = []
+        for part in final_parts:
+            pieces.append(part)
+            pieces.append("\n\n")
+        pieces[-1] = "\n"
+        _write_transcript(transcript_path, pieces)
+
+        print(f"✅ 转录+格式化全部完成: {transcript_path}")
+        return transcript_path, final_content
+    finally:
+        # 正常路径此时队列已空，shutdown 立即返回；异常路径（如落盘失败）
+        # 丢弃排队任务并等在途请求收尾，不让泄漏的线程拖住进程退出
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def transcribe(audio_path: Path, output_dir: str = "output"):
+    """完整流程（CLI 兼容）：转录 + AI 格式化，两阶段重叠执行
 
-    timing["structure"] = round(time.time() - t_structure, 1)
-    if timing["structure"] > 0.1:
-        print(f"⏱️ 结构标题生成耗时: {timing['structure']}s")
+    Whisper 每攒满 CHUNK_SIZE 字符就切出一块，立刻丢给通义千问后台格式化，
+    转录继续进行 —— 网络往返延迟被转录计算掩盖，总时长趋近两者中较长的一方，
+    而不是两者之和。
+    """
+    Path(output_dir).mkdir(exist_ok=True)
+    client = _get_llm_client()
+    model = _get_whisper_model()
+    print("✅ 模型就绪，开始转录...")
 
-    # ── 保存最终文件 ──
-    final_content = _build_content() + "\n"
-    transcript_path = Path(output_dir) / f"{audio_path.stem}.md"
-    with open(transcript_path, "w", encoding="utf-8") as f:
-        f.write(final_content)
+    pipeline = BatchedInferencePipeline(model=model)
+    segments, _info = pipeline.transcribe(
+        _load_waveform(audio_path), language="zh", batch_size=_batch_size_for_model(), vad_filter=True,
+        word_timestamps=False, condition_on_previous_text=False,
+    )
 
-    print(f"✅ 转录+格式化全部完成: {transcript_path}")
-    return transcript_path, final_content
+    GAP_THRESHOLD = 1.0
+    # 块数要到转录结束才知道，没法按块数定容；并发数与融合流水线
+    # 共用 LLM_CONCURRENCY 开关（如 API 限流收紧时统一调低）
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=int(os.environ.get("LLM_CONCURRENCY", "5"))
+    )
+    try:
+        futures = []        # 按切块顺序排列，保证输出顺序
+        raw_chunks = []     # 与 futures 对应的原始文本，格式化失败时回退用
+        buffer = []
+        buffer_len = 0
+        total_chars = 0
+        prev_end = 0.0
+
+        classify_future = None  # 首个整块提交时启动的说话人分类（Future）
+
+        def _chunk_prompt() -> str:
+            """按分类结果取单分支 prompt；未分类或分类失败用通用双分支"""
+            if classify_future is None:
+                return _PROMPT_TEMPLATE_STRIPPED
+            kind = classify_future.result()
+            if kind == "A":
+                return _DIALOGUE_PROMPT_STRIPPED
+            if kind == "B":
+                return _MONOLOGUE_PROMPT_STRIPPED
+            return _PROMPT_TEMPLATE_STRIPPED
+
+        def _format_chunk(chunk: str, info: str) -> str:
+            return _call_llm(client, chunk, part_info=info, prompt_template=_chunk_prompt())
+
+        def _submit_chunk():
+            nonlocal buffer_len, classify_future
+            if not buffer:
+                return
+            chunk = "".join(buffer)
+            buffer.clear()
+            buffer_len = 0
+            # 攒满整块说明后面多半还有：先发一次极小的分类调用（先入队，
+            # 各块的格式化任务在池里等它的结果），之后所有块只发匹配分支的
+            # prompt——双分支 PROMPT_TEMPLATE 的 token 量近乎单分支的两倍。
+            # 短文本只有收尾一小块，不值得多付这次调用，保持通用 prompt
+            if classify_future is None and len(chunk) >= CHUNK_SIZE:
+                classify_future = executor.submit(_classify_speakers, client, chunk)
+            idx = len(futures) + 1
+            raw_chunks.append(chunk)
+            futures.append(executor.submit(_format_chunk, chunk, f"第{idx}段 "))
+            logger.info(f"  📤 第 {idx} 块已提交通义千问（{len(chunk)} 字）")
+
+        log_lines = []
+        for segment in segments:
+            text = segment.text.strip()
+            if not text:
+                continue
+            gap = segment.start - prev_end
+            if buffer and gap >= GAP_THRESHOLD:
+                buffer.append("\n\n")
+                if VERBOSE:
+                    log_lines.append(f"  --- 停顿 {gap:.1f}s，分段 ---")
+            if VERBOSE:
+                log_lines.append(f"  [{segment.start:.1f}s - {segment.end:.1f}s] {text}")
+            buffer.append(text)
+            buffer_len += len(text)
+            total_chars += len(text)
+            prev_end = segment.end
+            # Whisper 的 segment 基本都在句子边界结束，攒够一块就按块提交
+            if buffer_len >= CHUNK_SIZE:
+                _submit_chunk()
 
+        _submit_chunk()
+        _flush_segment_log(log_lines)
+        print(f"\n📝 转录完成，共 {total_chars} 字，{len(futures)} 块待格式化")
 
-def transcribe(audio_path: Path, output_dir: str = "output"):
-    """完整流程（CLI 兼容）：转录 + AI 格式化"""
-    raw_text = transcribe_audio(audio_path)
-    return format_transcript(raw_text, audio_path, output_dir)
+        results = []
+        for i, future in enumerate(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"  ⚠️ 第 {i+1} 块格式化失败，使用原始文本: {e}")
+                results.append(raw_chunks[i])
+
+        title = audio_path.stem.replace("_", " ")
+        transcript_path = Path(output_dir) / f"{audio_path.stem}.md"
+        pieces = [f"# {title}\n\n"]
+        for chunk in results:
+            pieces.append(chunk)
+            pieces.append("\n\n")
+        if results:
+            pieces[-1] = "\n"
+        _write_transcript(transcript_path, pieces)
+
+        return transcript_path
+    finally:
+        # 与 transcribe_and_format 相同的收尾语义：正常路径队列已空、立即返回；
+        # 异常路径丢弃排队任务并等在途请求收尾，不泄漏线程拖住进程退出
+        executor.shutdown(wait=True, cancel_futures=True)